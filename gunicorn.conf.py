@@ -1,4 +1,11 @@
 import multiprocessing
+import os
+import secrets
+
+# Every worker must sign sessions with the same key, or a session made on one
+# worker is rejected by the next. This file runs in the master before workers
+# fork, so a key generated here is inherited by all of them.
+os.environ.setdefault('SECRET_KEY', secrets.token_hex(32))
 
 # Timeout settings
 timeout = 300
@@ -6,8 +13,14 @@ graceful_timeout = 300
 keepalive = 5
 
 # Worker settings
-workers = 1
-worker_class = 'sync'
+# Requests mostly wait on Claude, so threads let one worker serve several
+# users. gthread rather than gevent since Claude calls run on the app's own
+# asyncio loop thread. Resumes are shared between workers (Redis or files in
+# uploads/), so the usual 2 * CPUs + 1 workers is safe. Containers often
+# report the host's CPU count, so WEB_CONCURRENCY can pin it instead.
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+worker_class = 'gthread'
+threads = 8
 
 # Logging
 loglevel = 'info'
@@ -0,0 +1,25 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import clean_resume_text
+
+
+class CleanResumeTextTest(unittest.TestCase):
+
+    def test_removes_page_footer_lines(self):
+        text = "Jane Doe\nPage 1 of 2\nEXPERIENCE:\n  page 2  \nEngineer"
+        self.assertEqual(clean_resume_text(text), "Jane Doe\nEXPERIENCE:\nEngineer")
+
+    def test_keeps_content_lines_starting_with_page(self):
+        text = "PROJECTS:\nPage 3 layout engine for a static site generator\nPage 2 text"
+        self.assertEqual(
+            clean_resume_text(text),
+            "PROJECTS:\nPage 3 layout engine for a static site generator\nPage 2 text"
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()